@@ -36,6 +36,12 @@ from . import wavelet
 from . import operation
 from . import network
 from .network import ScatteringNetwork
-from pkg_resources import get_distribution
 
-__version__ = get_distribution("scatseisnet").version
\ No newline at end of file
+try:
+    from importlib.metadata import version
+except ImportError:  # Python 3.7
+    from pkg_resources import get_distribution
+
+    __version__ = get_distribution("scatseisnet").version
+else:
+    __version__ = version("scatseisnet")
@@ -32,7 +32,11 @@ output bins, etc.
         with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import collections
+import functools
+import os
 import typing as T
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 
@@ -41,10 +45,30 @@ try:
 except:
     tqdm = lambda x: x
 
-from .operation import pool
-from .wavelet import ComplexMorletBank
+from .operation import _array_reducer, pool
+from .wavelet import ComplexMorletBank, asnumpy
 
-from scipy.signal.windows import tukey
+#: Number of scalogram values of the deepest layer aimed for when segments are
+#: transformed by batches. Larger batches do not run faster on the CPU once the
+#: scalograms overflow the cache.
+BATCH_ELEMENTS = 2**18
+
+
+def _threaded_map(function: T.Callable, iterable: T.Iterable, n_jobs: int):
+    """Map a function over an iterable with a pool of threads.
+
+    Unlike :meth:`concurrent.futures.Executor.map`, at most ``n_jobs`` items
+    are submitted ahead of the one being consumed, so that the results of
+    all the batches are not held in memory at once.
+    """
+    with ThreadPoolExecutor(n_jobs) as executor:
+        futures = collections.deque()
+        for item in iterable:
+            if len(futures) == n_jobs:
+                yield futures.popleft().result()
+            futures.append(executor.submit(function, item))
+        while futures:
+            yield futures.popleft().result()
 
 
 class ScatteringNetwork:
@@ -109,13 +133,13 @@ class ScatteringNetwork:
     def transform_segment(
         self,
         segment: np.ndarray,
-        reduce_type: T.Union[T.Callable, None] = None,
+        reduce_type: T.Union[T.Callable, str, None] = None,
     ) -> list:
         """Scattering network transformation.
 
         This function transforms a single segment with the scattering network.
         The `reduce_type` parameter defines the pooling operation. It can be
-        either `max`, `avg`, or `med`.
+        either a reduction function, or one of `max`, `avg`, or `med`.
 
         Note
         ----
@@ -132,10 +156,12 @@ class ScatteringNetwork:
             n_channels)``, where ``bins`` is the number of time samples per
             segment and ``n_channels`` is the number of channels. The number of
             channels can be 1 or more.
-        reduce_type: callable, optional
-            The reduction function (e.g. :func:`numpy.mean`). If not defined,
-            the function returns the scalogram of each layer of the scattering
-            network, without any pooling operation.
+        reduce_type: callable or str, optional
+            The reduction function (e.g. :func:`numpy.mean`), or the name of a
+            reduction known to :func:`~.pool` (``"avg"``, ``"max"`` or
+            ``"med"``). If not defined, the function returns the scalogram of
+            each layer of the scattering network, without any pooling
+            operation.
 
         Returns
         -------
@@ -160,8 +186,21 @@ class ScatteringNetwork:
         >>> scattering_coefficients[1].shape
         (64, 12)
         """
-        # Apply taper
-        segment *= self.taper
+        # Time samples where the taper is flat, the only ones to be pooled
+        # (none at all if no sample of the taper is exactly one)
+        flat = np.flatnonzero(self.taper == 1)
+        flat = slice(flat[0], flat[-1] + 1) if flat.size else slice(0, 0)
+
+        # Apply taper (out of place, the input may be a read-only view), cast
+        # to the working precision of the filter banks in the same pass (no
+        # need without any layer)
+        if self.banks and flat.stop - flat.start < self.bins:
+            dtype = np.finfo(self.banks[0].dtype).dtype
+            segment = np.multiply(segment, self.taper, dtype=dtype)
+
+        # Pool on the device with the reductions known to pool only, other
+        # callables may not support CuPy arrays
+        on_device = reduce_type is None or _array_reducer(reduce_type) is not None
 
         # Initialize the scattering coefficients list
         output = list()
@@ -169,28 +208,35 @@ class ScatteringNetwork:
         # Calculate coefficients
         for bank in self.banks:
 
-            # Get scalogram
-            scalogram = bank.transform(segment)
+            # Get scalogram (kept on the device for the next layer)
+            scalogram = bank.transform(segment, to_host=False)
 
             # Replace input segment by scalogram for the next layer
             segment = scalogram
 
             # Pool scalogram and append to output
-            output.append(pool(scalogram[..., self.taper == 1], reduce_type))
+            pooled = scalogram[..., flat]
+            if not on_device:
+                pooled = asnumpy(pooled)
+            output.append(pool(pooled, reduce_type))
 
-        return output
+        return [asnumpy(coefficients) for coefficients in output]
 
     def transform(
         self,
         segments: np.ndarray,
         taper_alpha=None,
-        reduce_type: T.Union[T.Callable, None] = None,
+        reduce_type: T.Union[T.Callable, str, None] = None,
+        batch_size: T.Union[int, None] = None,
+        n_jobs: int = 1,
     ) -> list:
         """Transform a set of segments.
 
         This function is a wrapper to loop over a series of segments with the
         :meth:`~.transform_segment` method. Please refer to this method for more
-        information.
+        information. The segments are transformed by batches: each batch is
+        passed at once through every filter bank, so that the Fourier
+        transforms run over the whole batch instead of segment by segment.
 
         Parameters
         ----------
@@ -203,10 +249,23 @@ class ScatteringNetwork:
         taper_alpha: float, optional
             Tapering factor for the time domain. If None, no tapering is
             applied (default None).
-        reduce_type: callable, optional
-            The reduction function (e.g. :func:`numpy.mean`). If not defined,
-            the function returns the scalogram of each layer of the scattering
-            network, without any pooling operation.
+        reduce_type: callable or str, optional
+            The reduction function (e.g. :func:`numpy.mean`), or the name of a
+            reduction known to :func:`~.pool` (``"avg"``, ``"max"`` or
+            ``"med"``). If not defined, the function returns the scalogram of
+            each layer of the scattering network, without any pooling
+            operation.
+        batch_size: int, optional
+            Number of segments transformed at once. If None (default), the
+            batch size is chosen so that the scalograms of the deepest layer
+            hold about :data:`BATCH_ELEMENTS` values, which keeps the working
+            memory bounded for large networks.
+        n_jobs: int, optional
+            Number of threads transforming batches concurrently. The default
+            is 1 (sequential), and -1 uses as many threads as CPUs. The FFTs
+            of each batch already use the ``workers`` threads of the filter
+            banks, so set ``workers=1`` in the layer keyword arguments when
+            using several jobs.
 
         Returns
         -------
@@ -223,7 +282,7 @@ class ScatteringNetwork:
         ... ]
         >>> network = ScatteringNetwork(*layer_kwargs)
         >>> segments = np.random.randn(10, 128)
-        >>> scattering_coefficients = network.transform(segments, np.max)
+        >>> scattering_coefficients = network.transform(segments, reduce_type=np.max)
         >>> len(scattering_coefficients)
         2
         >>> scattering_coefficients[0].shape
@@ -235,16 +294,74 @@ class ScatteringNetwork:
         if taper_alpha is None:
             self.taper = np.array(np.ones(self.bins))
         else:
+            # Deferred import, scipy.signal takes most of the package import time
+            from scipy.signal.windows import tukey
+
             self.taper = np.array(tukey(self.bins, alpha=taper_alpha))
 
+        # Nothing to transform, one empty array per layer
+        if len(segments) == 0:
+            return [np.array([]) for _ in self.banks]
+
+        # Number of segments per batch
+        if batch_size is None:
+            batch_size = self.default_batch_size(np.shape(segments[0]))
+        elif batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}.")
+
         # Initialize the scattering coefficients list
-        features = [[] for _ in range(len(self))]
+        features = list()
+
+        # Batches and their transformation, run by a pool of threads if
+        # requested (the FFTs and array operations release the GIL)
+        starts = range(0, len(segments), batch_size)
+        batches = (np.asarray(segments[start : start + batch_size]) for start in starts)
+        transform_batch = functools.partial(
+            self.transform_segment, reduce_type=reduce_type
+        )
+        if n_jobs == -1:
+            n_jobs = os.cpu_count() or 1
+        elif n_jobs < 1:
+            raise ValueError(f"n_jobs must be -1 or at least 1, got {n_jobs}.")
+        if n_jobs > 1 and len(starts) > 1:
+            results = _threaded_map(transform_batch, batches, n_jobs)
+        else:
+            results = map(transform_batch, batches)
 
-        # Calculate coefficients
-        iter = tqdm(segments) if self.verbose else segments
-        for segment in iter:
-            scatterings = self.transform_segment(segment, reduce_type)
-            for layer_index, scattering in enumerate(scatterings):
-                features[layer_index].append(scattering)
+        # Calculate coefficients batch by batch
+        progress = tqdm(starts) if self.verbose else starts
+        for start, scatterings in zip(progress, results):
+
+            # Allocate the output arrays once the layer shapes are known
+            if not features:
+                features = [
+                    np.empty(
+                        (len(segments),) + scattering.shape[1:],
+                        scattering.dtype,
+                    )
+                    for scattering in scatterings
+                ]
 
-        return [np.array(feature) for feature in features]
+            # Write the batch coefficients in place
+            for feature, scattering in zip(features, scatterings):
+                feature[start : start + len(scattering)] = scattering
+
+        return features
+
+    def default_batch_size(self, shape: tuple) -> int:
+        """Default number of segments transformed at once.
+
+        Parameters
+        ----------
+        shape: tuple
+            The shape of a single segment, ``(n_channels, bins)``.
+
+        Returns
+        -------
+        batch_size: int
+            The largest number of segments for which the scalograms of the
+            deepest layer hold at most :data:`BATCH_ELEMENTS` values, and at
+            least one.
+        """
+        size = int(np.prod(shape)) * int(np.prod([len(bank) for bank in self.banks]))
+        return max(1, BATCH_ELEMENTS // size)
@@ -23,6 +23,7 @@ segmentation and pooling.
         with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import collections.abc
 import typing as T
 
 import numpy as np
@@ -49,12 +50,9 @@ def segment(
     ------
     The elements of the segmented array.
     """
-    bins = x.shape[-1]
-    index = 0
     stride = window_size if stride is None else stride
-    while (index + window_size) <= bins:
+    for index in range(0, x.shape[-1] - window_size + 1, stride):
         yield x[..., index : index + window_size]
-        index += stride
 
 
 def segmentize(
@@ -76,14 +74,21 @@ def segmentize(
 
     Returns
     -------
-    The segmented array with shape ``(n_windows, n_channels, n_times)``.
+    The segmented array with shape ``(n_windows, n_channels, n_times)``. This
+    is a read-only view on the input array, so no data is copied; call
+    :func:`numpy.array` on it if a writable array is needed. An empty array
+    is returned if the window is longer than the input.
     """
-    return np.array([x for x in segment(x, window_size, stride)])
+    if window_size > x.shape[-1]:
+        return np.array([])
+    stride = window_size if stride is None else stride
+    windows = np.lib.stride_tricks.sliding_window_view(x, window_size, axis=-1)
+    return np.moveaxis(windows[..., ::stride, :], -2, 0)
 
 
 def pool(
     x: np.ndarray,
-    reduce_type: T.Union[T.Callable, None] = None,
+    reduce_type: T.Union[T.Callable, str, None] = None,
 ) -> np.ndarray:
     """Pooling operation performed on the last axis.
 
@@ -91,8 +96,9 @@ def pool(
     ---------
     x: :class:`numpy.ndarray`
         The input data to pool.
-    reduce_type: callable, optional
-        The reducing operation (e.g. :func:`numpy.mean()`). If None, no
+    reduce_type: callable or str, optional
+        The reducing operation (e.g. :func:`numpy.mean()`), or the name of one
+        of the :data:`REDUCERS` (``"avg"``, ``"max"`` or ``"med"``). If None, no
         operation is performed.
 
     Returns
@@ -102,5 +108,53 @@ def pool(
     """
     if reduce_type is None:
         return x
-    else:
-        return reduce_type(x, axis=-1)
+    reducer = _array_reducer(reduce_type)
+    if reducer is not None:
+        return reducer(x)
+    return reduce_type(x, axis=-1)
+
+
+def _array_reducer(reduce_type: T.Union[T.Callable, str]) -> T.Optional[T.Callable]:
+    """Reduction by array methods for a reduction name or NumPy function.
+
+    These reductions work on NumPy and CuPy arrays alike. None is returned for
+    any other callable, which may only support NumPy arrays.
+    """
+    if isinstance(reduce_type, str):
+        if reduce_type not in REDUCERS:
+            raise ValueError(
+                f"Unknown reduce_type {reduce_type!r}, "
+                f"supported are {', '.join(map(repr, REDUCERS))}."
+            )
+        return REDUCERS[reduce_type]
+    if isinstance(reduce_type, collections.abc.Hashable):
+        return _REDUCER_FUNCTIONS.get(reduce_type)
+    return None
+
+
+def _average(x: np.ndarray) -> np.ndarray:
+    return x.mean(axis=-1)
+
+
+def _maximum(x: np.ndarray) -> np.ndarray:
+    return x.max(axis=-1)
+
+
+def _median(x: np.ndarray) -> np.ndarray:
+    return np.median(x, axis=-1)
+
+
+#: Reducing operations available by name in :func:`pool`.
+REDUCERS = {
+    "avg": _average,
+    "max": _maximum,
+    "med": _median,
+}
+
+# NumPy reducing functions mapped to the corresponding array methods, which
+# skip the function dispatch layer on each call
+_REDUCER_FUNCTIONS = {
+    np.mean: _average,
+    np.max: _maximum,
+    np.amax: _maximum,
+}
@@ -22,18 +22,78 @@ This module contains the wavelet class and functions to generate wavelets.
         with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import functools
 import typing as T
 
-try:
-    import cupy as xp  # type: ignore
-except ImportError:
-    import numpy as xp
 import numpy as np
+from scipy import fft
+
+#: Names of the array backends of the filter banks.
+BACKENDS = ("auto", "numpy", "cupy")
+
+
+@functools.lru_cache(maxsize=None)
+def get_backend(backend: str = "auto") -> tuple:
+    """Array and FFT modules of a backend.
+
+    Parameters
+    ----------
+    backend: str, optional
+        One of ``"numpy"`` (CPU), ``"cupy"`` (GPU) or ``"auto"`` (default),
+        which selects CuPy if it is installed and NumPy otherwise.
+
+    Returns
+    -------
+    tuple
+        The array module (:mod:`numpy` or :mod:`cupy`) and the corresponding
+        FFT module (:mod:`scipy.fft` or :mod:`cupyx.scipy.fft`).
+
+    Raises
+    ------
+    ValueError
+        If the backend is unknown.
+    ImportError
+        If the ``"cupy"`` backend is requested and CuPy is not installed.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}.")
+    if backend != "numpy":
+        try:
+            import cupy  # type: ignore
+            from cupyx.scipy import fft as cupy_fft  # type: ignore
+
+            return cupy, cupy_fft
+        except ImportError:
+            if backend == "cupy":
+                raise
+    return np, fft
+
+
+def asnumpy(x: np.ndarray) -> np.ndarray:
+    """Host copy of an array.
+
+    Arguments
+    ---------
+    x: :class:`numpy.ndarray` or :class:`cupy.ndarray`
+        The array to copy to the host memory.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        The input array if it already lives on the host, or its copy to the
+        host memory otherwise.
+    """
+    if hasattr(x, "__cuda_array_interface__"):
+        return x.get()
+    else:
+        return x
+
 
 def gaussian_window(
-    x: xp.ndarray,
-    width: T.Union[float, T.Sequence[float], xp.ndarray],
-) -> xp.ndarray:
+    x: np.ndarray,
+    width: T.Union[float, T.Sequence[float], np.ndarray],
+    xp=np,
+) -> np.ndarray:
     """Gaussian function.
 
     This function can generate a bank of windows at once if the width
@@ -48,6 +108,9 @@ def gaussian_window(
         Window width (in the same units than the input variable). If an array
         is provided, the function returns as many windows as the number of
         elements of this parameter.
+    xp : module, optional
+        Array module used for the computation, :mod:`numpy` (default) or
+        :mod:`cupy`.
     amplitude : float or np.ndarray, optional
         Window amplitude at maximum (default 1). If this parameter is a vector,
         it should have the same number of elements than the width.
@@ -60,20 +123,24 @@ def gaussian_window(
         shape (len(width), len(x)).
     """
     # turn parameters into a numpy arrays for dimension check
-    x = xp.array(x)
-    width = xp.array(width)
+    x = xp.asarray(x)
+    width = xp.asarray(width)
 
     # add new axis for outer product if several widths are given
     width = width[:, None] if width.shape and (width.ndim == 1) else width
 
-    return xp.exp(-((x / width) ** 2))
+    # in-place operations to avoid (n_filters, bins) temporaries
+    window = xp.square(x / width)
+    window *= -1
+    return xp.exp(window, out=window) if window.ndim else xp.exp(window)
 
 
 def complex_morlet(
-    x: xp.ndarray,
-    center: T.Union[float, T.Sequence[float], xp.ndarray],
-    width: T.Union[float, T.Sequence[float], xp.ndarray],
-) -> xp.ndarray:
+    x: np.ndarray,
+    center: T.Union[float, T.Sequence[float], np.ndarray],
+    width: T.Union[float, T.Sequence[float], np.ndarray],
+    xp=np,
+) -> np.ndarray:
     """Complex Morlet wavelet.
 
     The complex Morlet wavelet is a complex plane wave modulated by a Gaussian
@@ -92,6 +159,9 @@ def complex_morlet(
         Temporal signal width in seconds.
     center: float or :class:`numpy.ndarray` or :class:`cupy.ndarray`.
         Center frequency in Hertz.
+    xp: module, optional
+        Array module used for the computation, :mod:`numpy` (default) or
+        :mod:`cupy`.
 
     Returns
     -------
@@ -101,13 +171,14 @@ def complex_morlet(
         matrix with shape ``(len(width), len(x))``.
     """
     # turn parameters into a numpy arrays for dimension check
-    x = xp.array(x)
-    width = xp.array(width)
-    center = xp.array(center)
+    x = xp.asarray(x)
+    width = xp.asarray(width)
+    center = xp.asarray(center)
 
-    # add new axis for outer product if several widths are given
-    width = width[:, None] if width.shape else width
-    center = center[:, None] if center.shape else center
+    # add new axis for outer product if several widths are given, unless the
+    # caller already provides column vectors
+    width = width[:, None] if width.ndim == 1 else width
+    center = center[:, None] if center.ndim == 1 else center
 
     # check compatibility between arguments
     if width.shape and center.shape:
@@ -115,7 +186,10 @@ def complex_morlet(
             width.shape == center.shape
         ), f"Shape for widths {width.shape} and centers {center.shape} differ."
 
-    return gaussian_window(x, width) * xp.exp(2j * xp.pi * center * x)
+    # single complex exponential for both the Gaussian window and the plane
+    # wave, exp(-(x / width) ** 2 + 2j * pi * center * x)
+    wavelet = 2j * xp.pi * center * x - xp.square(x / width)
+    return xp.exp(wavelet, out=wavelet) if wavelet.ndim else xp.exp(wavelet)
 
 
 class ComplexMorletBank:
@@ -129,6 +203,9 @@ class ComplexMorletBank:
         quality: float = 4.0,
         normalize_wavelet=None,
         sampling_rate: float = 1.0,
+        dtype: T.Union[str, np.dtype] = "complex64",
+        backend: str = "auto",
+        workers: int = -1,
     ):
         """Filter bank creation.
 
@@ -146,17 +223,43 @@ class ComplexMorletBank:
             Number of filters per octaves (default 1).
         quality: float, optional
             Filter bank quality factor (constant, default 4).
+        normalize_wavelet: str, optional
+            Normalize each wavelet by its ``"L1"`` or ``"L2"`` norm (default
+            None, no normalization). The normalization is applied before the
+            Fourier transform, so it comes at no cost in the transform.
         sampling_rate: float, optional
             Sampling rate of the signal (default 1).
+        dtype: str or :class:`numpy.dtype`, optional
+            Complex data type of the filter bank (default ``"complex64"``).
+            The segments are transformed in the corresponding real precision,
+            so that single precision halves the memory traffic of the
+            transform. Use ``"complex128"`` for double precision.
+        backend: str, optional
+            Array backend of the filter bank, ``"numpy"`` (CPU), ``"cupy"``
+            (GPU), or ``"auto"`` (default) to use CuPy if it is installed and
+            NumPy otherwise.
+        workers: int, optional
+            Number of CPU threads of the FFTs on the NumPy backend (default -1
+            for all the cores, see :func:`scipy.fft.fft`). Use 1 when the
+            segments are already transformed in several threads. Ignored on
+            the CuPy backend.
         """
         self.bins = bins
         self.octaves = octaves
         self.resolution = resolution
         self.quality = quality
         self.sampling_rate = sampling_rate
+        self.dtype = np.dtype(dtype)
+        if not np.issubdtype(self.dtype, np.complexfloating):
+            raise ValueError(
+                f"The filter bank dtype must be complex, got {self.dtype}."
+            )
+        self.backend = get_backend(backend)[0].__name__
+        self.workers = workers
+        xp, fft = get_backend(self.backend)
 
         # Generate the filter bank
-        self.wavelets = complex_morlet(self.times, self.centers, self.widths)
+        self.wavelets = complex_morlet(self.times, self.centers, self.widths, xp=xp)
 
         # Normalize filter bank or not
         if normalize_wavelet is not None:
@@ -165,71 +268,133 @@ class ComplexMorletBank:
             elif normalize_wavelet == 'L2':
                 self.norm_factor = xp.sqrt((xp.abs(self.wavelets)**2).sum(axis=1))[:, xp.newaxis]
             else:
-                AttributeError(f"'normalize_wavelet' has no attribute {normalize_wavelet}",
-                               "Supported are normalization by the 'L1'- and 'L2'-norm'.")
+                raise ValueError(
+                    f"Unknown normalization {normalize_wavelet!r} for "
+                    "'normalize_wavelet', supported are 'L1' and 'L2'."
+                )
 
             # Normalize filter bank
             self.wavelets /= self.norm_factor
 
+        # Cast to the working precision once built in double precision
+        self.wavelets = self.wavelets.astype(self.dtype)
+
         # Obtain the filter bank in the frequency domain
-        self.spectra = xp.fft.fft(self.wavelets)
+        self.spectra = fft.fft(self.wavelets, **self._fft_kwargs)
+
+        # Spectra centering the scalograms
+        self._shifted_spectra = self._shift_spectra()
 
         # Size attributes
         self.size = self.wavelets.shape[0]
-        
+
+    def __setstate__(self, state: dict):
+        """Restore a pickled filter bank.
+
+        Filter banks pickled with earlier versions of the package lack the
+        backend, workers and dtype attributes as well as the shifted spectra,
+        which are then inferred from the stored spectra.
+        """
+        self.__dict__.update(state)
+        backend = type(self.spectra).__module__.split(".")[0]
+        self.__dict__.setdefault("backend", backend)
+        self.__dict__.setdefault("workers", -1)
+        self.__dict__.setdefault("dtype", self.spectra.dtype)
+        if "_shifted_spectra" not in self.__dict__:
+            self._shifted_spectra = self._shift_spectra()
+
+    def _shift_spectra(self) -> np.ndarray:
+        """Spectra modulated by the phase ramp of a circular shift.
+
+        The shift of half the bins makes the inverse transform of the
+        convolution come out centered, as with an fftshift but without an
+        extra pass over it. For an even number of bins, the ramp is exactly an
+        alternating sign.
+        """
+        xp, _ = get_backend(self.backend)
+        bins = self.bins
+        if bins % 2 == 0:
+            shift = xp.ones(bins)
+            shift[1::2] = -1.0
+        else:
+            shift = xp.exp(-2j * xp.pi * xp.arange(bins) * (bins // 2) / bins)
+        return (self.spectra * shift).astype(self.dtype)
+
     def __repr__(self) -> str:
         """Representation of the filter bank."""
         return (
             f"ComplexMorletBank(bins={self.bins}, octaves={self.octaves}, "
             f"resolution={self.resolution}, quality={self.quality}, "
-            f"sampling_rate={self.sampling_rate}, len={len(self)})"
+            f"sampling_rate={self.sampling_rate}, backend={self.backend!r}, "
+            f"len={len(self)})"
         )
 
     def __len__(self) -> int:
         """Length of the filter bank."""
         return self.octaves * self.resolution
 
-    def transform(self, segment: xp.ndarray) -> np.ndarray:
+    def transform(
+        self,
+        segment: np.ndarray,
+        to_host: bool = True,
+        out: T.Optional[np.ndarray] = None,
+    ) -> np.ndarray:
         """Compute the scalogram for a given segment.
 
+        Any number of leading axes is accepted, so that a whole batch of
+        segments (e.g. with shape ``(n_segments, channels, bins)``) is
+        transformed with a single forward and a single inverse FFT call over
+        the last axis. Prefer one call on a stacked batch over a Python loop of
+        calls on single segments.
+
         Parameters
         ----------
         segment: :class:`numpy.ndarray`
             The segment to be transformed of shape ``(..., channels, bins)``. The
             number of bins should be the same as the number of bins of the
             filter bank.
+        to_host: bool, optional
+            Whether to copy the scalogram back to the host memory when the
+            filter bank lives on the GPU (default True). Set to False to keep
+            it on the device, for instance to feed another filter bank.
+        out: :class:`numpy.ndarray` or :class:`cupy.ndarray`, optional
+            Array of shape ``(..., channels, n_filters, bins)`` and of the real
+            dtype of the filter bank, on the filter bank backend, in which the
+            scalogram is written. Reusing it over calls with segments of the
+            same shape saves the allocation of the result.
 
         Returns
         -------
-        scalogram: :class:`numpy.ndarray`
+        scalogram: :class:`numpy.ndarray` or :class:`cupy.ndarray`
             The scalograms for all channels with shape (the ellipsis stands for
             unknown number of input dimensions)
-            `n_channels, ..., n_filters, n_bins`.
+            ``(..., channels, n_filters, bins)``.
         """
-        segment = xp.fft.fft(xp.array(segment))
-        convolved = segment[..., None, :] * xp.array(self.spectra)
-        scalogram = xp.fft.fftshift(xp.fft.ifft(convolved), axes=-1)
-        if xp.__name__ == "cupy":
-            return np.abs(xp.asnumpy(scalogram))
-        else:
-            return xp.abs(scalogram)
+        xp, fft = get_backend(self.backend)
+        if xp is np:
+            segment = asnumpy(segment)
+        segment = xp.asarray(segment, dtype=np.finfo(self.dtype).dtype)
+        segment = fft.fft(segment, **self._fft_kwargs)
+        convolved = segment[..., None, :] * self._shifted_spectra
+        convolved = fft.ifft(convolved, overwrite_x=True, **self._fft_kwargs)
+        scalogram = xp.abs(convolved, out=out)
+        return asnumpy(scalogram) if to_host else scalogram
+
+    @property
+    def _fft_kwargs(self) -> dict:
+        """Extra keyword arguments of the FFTs for the bank backend."""
+        return {"workers": self.workers} if self.backend == "numpy" else {}
 
     @property
     def times(self) -> np.ndarray:
         """Wavelet bank symmetric time vector in seconds."""
         duration = self.bins / self.sampling_rate
-        if xp.__name__ == "cupy":
-            return xp.asnumpy(xp.linspace(-0.5, 0.5, num=self.bins) * duration)
-        else:
-            return xp.linspace(-0.5, 0.5, num=self.bins) * duration
+        return np.linspace(-0.5, 0.5, num=self.bins) * duration
 
     @property
     def frequencies(self) -> np.ndarray:
         """Wavelet bank frequency vector in Hertz."""
-        if xp.__name__ == "cupy":
-            return xp.asnumpy(xp.linspace(0, self.sampling_rate, self.bins))
-        else:
-            return xp.linspace(0, self.sampling_rate, self.bins)
+        return np.linspace(0, self.sampling_rate, self.bins)
 
     @property
     def nyquist(self) -> float:
@@ -244,32 +409,20 @@ class ComplexMorletBank:
     @property
     def ratios(self) -> np.ndarray:
         """Wavelet bank ratios."""
-        ratios = xp.linspace(self.octaves, 0.0, self.shape[0], endpoint=False)
-        if xp.__name__ == "cupy":
-            return xp.asnumpy(-ratios[::-1])
-        else:
-            return -ratios[::-1]
+        ratios = np.linspace(self.octaves, 0.0, self.shape[0], endpoint=False)
+        return -ratios[::-1]
 
     @property
     def scales(self) -> np.ndarray:
         """Wavelet bank scaling factors."""
-        if xp.__name__ == "cupy":
-            return xp.asnumpy(2**self.ratios)
-        else:
-            return 2**self.ratios
+        return 2**self.ratios
 
     @property
     def centers(self) -> np.ndarray:
         """Wavelet bank center frequencies."""
-        if xp.__name__ == "cupy":
-            return xp.asnumpy(self.scales * self.nyquist)
-        else:
-            return self.scales * self.nyquist
+        return self.scales * self.nyquist
 
     @property
     def widths(self) -> np.ndarray:
         """Wavelet bank temporal widths."""
-        if xp.__name__ == "cupy":
-            return xp.asnumpy(self.quality / self.centers)
-        else:
-            return self.quality / self.centers
+        return self.quality / self.centers